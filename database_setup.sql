@@ -7,7 +7,6 @@
         income FLOAT,
         credit_score FLOAT,
         loan_status INTEGER,
-        exchange_rate FLOAT,
         income_usd FLOAT,
         loan_income_ratio FLOAT,
         debt_service_ratio FLOAT,
@@ -18,10 +17,17 @@
         sharpe_ratio FLOAT,
         value_at_risk FLOAT,
         credit_score_category TEXT,
-        timestamp TEXT
+        run_id INTEGER REFERENCES loan_runs (id)
     );
 
     CREATE INDEX IF NOT EXISTS idx_credit_score ON loans (credit_score);
+    CREATE INDEX IF NOT EXISTS idx_loan_status ON loans (loan_status);
+
+    CREATE TABLE loan_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp TEXT,
+        exchange_rate FLOAT
+    );
 
     CREATE TABLE pipeline_log (
         run_time TEXT,
@@ -5,8 +5,32 @@ import requests
 import logging
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from sklearn.preprocessing import LabelEncoder
+from requests.adapters import HTTPAdapter
+from scipy.special import expit
+from urllib3.util.retry import Retry
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; the NumPy kernel below is used instead
+    njit = None
+
+try:
+    import pyximport
+except ImportError:  # Cython is optional; the numba/NumPy kernels below are used instead
+    pyximport = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; without it only the SQLite copy is written
+    pa = pq = None
+
+try:
+    import requests_cache
+except ImportError:  # requests_cache is optional; responses are then fetched on every run
+    requests_cache = None
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -14,70 +38,223 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 # Constants
 DEFAULT_EXCHANGE_RATE = 1.3
 DB_PATH = "loans.db"
+PARQUET_PATH = "loans.parquet"  # Columnar copy of the loans table for analytics consumers
+CSV_CHUNKSIZE = 200_000  # Rows per CSV chunk; bounds peak memory of the pipeline
+CSV_DTYPES = {
+    # Explicit types for the known schema so every chunk parses the same way. Numeric columns are
+    # float64: full precision for income, and NaN-capable so blank cells can be imputed later
+    # (transform_data downcasts its kernel inputs to float32 itself)
+    'age': np.float64,
+    'income': np.float64,
+    'credit_score': np.float64,
+    'gender': 'category',
+    'marital_status': 'category',
+    # loan_status is left to inference: a 'category' read would turn stored 0/1 codes into '0'/'1' strings
+}
+ID_COLUMNS = ('loan_id', 'id', 'application_id')  # Candidate unique loan identifiers, in order of preference
+CREDIT_SCORE_BINS = np.array([600, 750], dtype=np.int32)  # Inner edges of the credit score buckets
+CREDIT_SCORE_LABELS = ['Low', 'Medium', 'High']
 DATA_PATH = "data/loan.csv"
 API_URL = "https://api.exchangerate-api.com/v4/latest/USD"  # Real API for exchange rates
 LOAN_API_URL = "https://api.mockloans.com/v1/loans"  # Placeholder for real loan data API
+HTTP_CACHE_NAME = "http_cache"
+HTTP_CACHE_EXPIRE = 3600  # Seconds; exchange rates only change daily
+HTTP_TIMEOUT = (3, 10)  # (connect, read) seconds
 
 # Ensure data directory exists
 os.makedirs("data", exist_ok=True)
 
+# Output rows of the feature kernels, in column order
+FEATURE_COLUMNS = ['income_usd', 'loan_income_ratio', 'debt_service_ratio', 'loan_to_value_ratio', 'net_worth',
+                   'default_probability', 'expected_loss', 'sharpe_ratio', 'value_at_risk']
 
-def extract_data(file_path, loan_api_url=None, exchange_api_url=None):
-    """Extract loan data from multiple sources: CSV, API, SQL, JSON."""
-    logging.info("Extracting data...")
-    
+
+def _compute_features_numpy(income, cs, exchange_rate, R, out):
+    """Vectorized NumPy fallback for the feature kernel (used when neither Cython nor numba is available)."""
+    np.multiply(income, np.float32(1.0 / exchange_rate), out=out[0])
+    out[1] = 0.2 + 0.6 * R[0]
+    out[2] = income / (10000 + 40000 * R[1])
+    out[3] = 0.5 + R[2]
+    out[4] = income - (5000 + 20000 * R[3])
+    out[5] = expit((cs - 700) * np.float32(1.0 / 50.0))
+    out[6] = out[5] * (5000 + 45000 * R[4])
+    out[7] = (income - (1000 + 4000 * R[5])) / (500 + 1500 * R[6])
+    out[8] = -1.65 * (1000 + 9000 * R[7])
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _compute_features(income, cs, exchange_rate, R, out):
+        """Fused per-row feature kernel: one pass over the inputs, every output computed in registers."""
+        inv_exchange_rate = 1.0 / exchange_rate
+        for i in prange(income.shape[0]):
+            inc = income[i]
+            default_probability = 1.0 / (1.0 + np.exp(-(cs[i] - 700.0) * (1.0 / 50.0)))
+            out[0, i] = inc * inv_exchange_rate
+            out[1, i] = 0.2 + 0.6 * R[0, i]
+            out[2, i] = inc / (10000.0 + 40000.0 * R[1, i])
+            out[3, i] = 0.5 + R[2, i]
+            out[4, i] = inc - (5000.0 + 20000.0 * R[3, i])
+            out[5, i] = default_probability
+            out[6, i] = default_probability * (5000.0 + 45000.0 * R[4, i])
+            out[7, i] = (inc - (1000.0 + 4000.0 * R[5, i])) / (500.0 + 1500.0 * R[6, i])
+            out[8, i] = -1.65 * (1000.0 + 9000.0 * R[7, i])
+else:
+    _compute_features = _compute_features_numpy
+
+FEATURE_KERNEL = 'numba' if njit is not None else 'NumPy'
+
+if pyximport is not None:
+    # Compile the Cython feature kernel (loan_features.pyx) on first import; it takes precedence when it builds
+    _pyx_importers = pyximport.install(language_level=3)
     try:
-        df = pd.read_csv(file_path)
-        logging.info("CSV data loaded successfully.")
-    except Exception as e:
-        logging.error(f"Error reading CSV: {e}")
-        df = pd.DataFrame()
+        from loan_features import compute_features as _compute_features
+        FEATURE_KERNEL = 'Cython'
+    except Exception as e:  # usually no C compiler or OpenMP; the build log above has the details
+        logging.warning(f"Could not build the Cython feature kernel ({type(e).__name__}: {e}); falling back to {FEATURE_KERNEL}.")
+    finally:
+        pyximport.uninstall(*_pyx_importers)
+
+logging.info(f"Using the {FEATURE_KERNEL} feature kernel.")
+
+
+def create_session():
+    """Create an HTTP session with connection pooling, retries and, if available, a response cache."""
+    if requests_cache is not None:
+        session = requests_cache.CachedSession(HTTP_CACHE_NAME, expire_after=HTTP_CACHE_EXPIRE)
+    else:
+        session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=Retry(total=3, backoff_factor=0.3))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def extract_data(file_path, loan_api_url=None, exchange_api_url=None, chunksize=CSV_CHUNKSIZE):
+    """Extract loan data from multiple sources: CSV, API, SQL, JSON.
     
-    if loan_api_url:
-        try:
-            response = requests.get(loan_api_url)
-            if response.status_code == 200:
-                api_data = pd.DataFrame(response.json())
-                df = pd.concat([df, api_data], ignore_index=True)
-                logging.info("Loan API data merged successfully.")
-        except Exception as e:
-            logging.warning(f"Failed to fetch loan API data: {e}")
+    Yields DataFrame chunks so peak memory is bounded by ``chunksize`` rather than the file size.
+    The exchange rate is a single scalar, so it is kept in ``chunk.attrs['exchange_rate']``
+    rather than as a constant column.
+    """
+    logging.info("Extracting data...")
     
-    if exchange_api_url:
+    # Both APIs are independent, so fetch them concurrently to overlap their latency
+    session = create_session()
+    # The generator may be abandoned mid-way (e.g. a failed load), so always release the session
+    try:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            loan_future = executor.submit(session.get, loan_api_url, timeout=HTTP_TIMEOUT) if loan_api_url else None
+            exchange_future = executor.submit(session.get, exchange_api_url, timeout=HTTP_TIMEOUT) if exchange_api_url else None
+        
+        exchange_rate = None
+        if exchange_future:
+            try:
+                response = exchange_future.result()
+                if response.status_code == 200:
+                    exchange_rates = response.json()
+                    exchange_rate = exchange_rates['rates'].get('CAD', DEFAULT_EXCHANGE_RATE)
+                    logging.info("Exchange rates applied successfully.")
+            except Exception as e:
+                logging.warning(f"Failed to fetch exchange rates: {e}")
+                exchange_rate = DEFAULT_EXCHANGE_RATE
+        
+        def apply_exchange_rate(chunk):
+            if exchange_rate is not None:
+                chunk.attrs['exchange_rate'] = exchange_rate
+            return chunk
+        
+        # Only a CSV that cannot be opened is tolerated; an error partway through the file propagates,
+        # so load_data discards its staging table instead of swapping in a partial load
         try:
-            response = requests.get(exchange_api_url)
-            if response.status_code == 200:
-                exchange_rates = response.json()
-                df['exchange_rate'] = exchange_rates['rates'].get('CAD', DEFAULT_EXCHANGE_RATE)
-                logging.info("Exchange rates applied successfully.")
+            reader = pd.read_csv(file_path, chunksize=chunksize, dtype=CSV_DTYPES, engine='c')
         except Exception as e:
-            logging.warning(f"Failed to fetch exchange rates: {e}")
-            df['exchange_rate'] = DEFAULT_EXCHANGE_RATE
-    
-    return df
+            logging.error(f"Error reading CSV: {e}")
+        else:
+            with reader:
+                for chunk in reader:
+                    yield apply_exchange_rate(chunk)
+            logging.info("CSV data loaded successfully.")
+        
+        if loan_future:
+            try:
+                response = loan_future.result()
+                if response.status_code == 200:
+                    api_data = pd.DataFrame(response.json())
+                    logging.info("Loan API data merged successfully.")
+                    yield apply_exchange_rate(api_data)
+            except Exception as e:
+                logging.warning(f"Failed to fetch loan API data: {e}")
+    finally:
+        session.close()
 
-def validate_data(df):
-    """Validate data integrity: Check for missing values, duplicates, and inconsistencies."""
+def split_columns(df):
+    """Classify columns as numeric or categorical in a single pass over ``df.dtypes``."""
+    numeric_cols, categorical_cols = [], []
+    for col, dtype in df.dtypes.items():
+        if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+            numeric_cols.append(col)
+        elif isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            categorical_cols.append(col)
+    return numeric_cols, categorical_cols
+
+def validate_data(df, numeric_cols=None, categorical_cols=None, dedupe=True, seen_ids=None):
+    """Validate data integrity: Check for missing values, duplicates, and inconsistencies.
+    
+    Duplicates are detected on the loan identifier when the data has one, otherwise on whole rows;
+    pass ``dedupe=False`` to skip the check for trusted sources. Pass the same ``seen_ids`` set for
+    every chunk so identifiers already loaded from earlier chunks are dropped too.
+    """
     logging.info("Validating data...")
-    df.drop_duplicates(inplace=True)
+    id_col = next((col for col in ID_COLUMNS if col in df.columns), None)
+    if dedupe:
+        if id_col is not None:
+            # Rows without an identifier cannot be matched, so they are never treated as duplicates
+            ids = df[id_col]
+            has_id = ids.notna()
+            duplicate = has_id & ids.duplicated()
+            if seen_ids:
+                duplicate |= has_id & ids.isin(seen_ids)
+            if duplicate.any():
+                df = df[~duplicate].reset_index(drop=True)
+            if seen_ids is not None:
+                seen_ids.update(df[id_col].dropna().tolist())
+        else:
+            df.drop_duplicates(inplace=True)
     
     # Ensure loan_status is explicitly retained
     if 'loan_status' not in df.columns:
         logging.error("loan_status is already missing before validation!")
     
     # Fill missing values (numeric columns only, but keep loan_status as is)
-    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-    categorical_cols = df.select_dtypes(include=['object']).columns.tolist()
-    df[numeric_cols] = df[numeric_cols].fillna(df[numeric_cols].median())
-    df = df[numeric_cols + categorical_cols]  # Keep categorical columns including loan_status
+    if numeric_cols is None or categorical_cols is None:
+        numeric_cols, categorical_cols = split_columns(df)
+    # Median-impute on the raw 2-D block; only columns that actually contain NaNs are written back
+    # The identifier is not a measurement; a missing id stays missing rather than getting the median id
+    numeric_cols = [col for col in numeric_cols if col != id_col]
+    values = df[numeric_cols].to_numpy()
+    mask = np.isnan(values)
+    has_missing = mask.any(axis=0)
+    if has_missing.any():
+        values, mask = values[:, has_missing], mask[:, has_missing]
+        np.copyto(values, np.nanmedian(values, axis=0), where=mask)
+        # The block may have been upcast (e.g. float32 + int64 -> float64); restore each column's own dtype
+        for col, filled in zip([col for col, missing in zip(numeric_cols, has_missing) if missing], values.T):
+            df[col] = filled.astype(df[col].dtype, copy=False)
+    # Keep categorical columns including loan_status; only copy the frame if other columns must be dropped
+    keep_cols = ([id_col] if id_col is not None and id_col not in categorical_cols else []) + numeric_cols + categorical_cols
+    if len(keep_cols) != len(df.columns):
+        df = df[keep_cols]
     
     if df.isnull().sum().sum() > 0:
         logging.warning("Remaining missing values detected after imputation.")
     
     return df
 
-def transform_data(df):
-    """Perform feature engineering, encode categorical variables, and calculate financial risk metrics."""
+def transform_data(df, label_encoders=None, categorical_cols=None):
+    """Perform feature engineering, encode categorical variables, and calculate financial risk metrics.
+    
+    Pass the same ``label_encoders`` dict for every chunk so categorical codes stay consistent.
+    """
     logging.info("Transforming data...")
     
     # Debug: Check if loan_status exists before transformation
@@ -85,59 +262,203 @@ def transform_data(df):
         logging.error("loan_status column is missing BEFORE transformation!")
     
     # Ensure loan_status remains in the dataset before encoding
-    if 'loan_status' in df.columns and df['loan_status'].dtype == 'object':
-        df['loan_status'] = df['loan_status'].map({'Approved': 1, 'Denied': 0})
+    if 'loan_status' in df.columns and not pd.api.types.is_numeric_dtype(df['loan_status']):
+        df['loan_status'] = df['loan_status'].astype(object).map({'Approved': 1, 'Denied': 0})
+    # Always float64 so the column keeps one type whether or not a chunk has unmapped/missing statuses
+    if 'loan_status' in df.columns:
+        df['loan_status'] = df['loan_status'].astype(np.float64, copy=False)
     
     # Detect categorical columns dynamically (excluding loan_status, which is already mapped)
-    categorical_columns = [col for col in df.select_dtypes(include=['object']).columns if col != 'loan_status']
-    numerical_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+    if categorical_cols is None:
+        categorical_cols = split_columns(df)[1]
+    categorical_columns = [col for col in categorical_cols if col != 'loan_status']
     
-    # Encode categorical variables safely
-    label_encoders = {}
+    # Encode categorical variables safely (hash-based factorization via pandas categoricals)
+    if label_encoders is None:
+        label_encoders = {}
     for col in categorical_columns:
-        le = LabelEncoder()
-        df[col] = le.fit_transform(df[col].astype(str))
-        label_encoders[col] = le
+        values = df[col].astype(str)
+        cats = values.astype('category')
+        if col in label_encoders:
+            # Extend the categories seen in earlier chunks without renumbering them
+            known = label_encoders[col]
+            cats = values.astype(pd.CategoricalDtype(known.append(cats.cat.categories.difference(known))))
+        df[col] = cats.cat.codes.astype(np.int32)
+        label_encoders[col] = cats.cat.categories  # codes index into these for inverse lookups
     
     # Debug: Ensure loan_status still exists after encoding
     if 'loan_status' not in df.columns:
         logging.error("loan_status column is missing AFTER encoding!")
     
-    df['income_usd'] = df['income'] / df['exchange_rate']
+    income = np.ascontiguousarray(df['income'].to_numpy(np.float32))
+    cs = np.ascontiguousarray(df['credit_score'].to_numpy(np.float32))
+    exchange_rate = df.attrs.get('exchange_rate', DEFAULT_EXCHANGE_RATE)
+    df.attrs['exchange_rate'] = exchange_rate  # Record the rate actually used; load_data stores it in loan_runs
     
-    # Financial Risk Metrics (Apply only to numerical data)
-    df['loan_income_ratio'] = np.random.uniform(0.2, 0.8, size=len(df))
-    df['debt_service_ratio'] = df['income'] / np.random.uniform(10000, 50000, size=len(df))
-    df['loan_to_value_ratio'] = np.random.uniform(0.5, 1.5, size=len(df))
-    df['net_worth'] = df['income'] - np.random.uniform(5000, 25000, size=len(df))
+    # Random draws for the simulated metrics: one float32 (8, N) block from a PCG64 generator
+    rng = np.random.default_rng()
+    R = rng.random((8, len(df)), dtype=np.float32)
+    
+    # Financial and Advanced Risk Metrics, computed in a single fused pass
+    features = np.empty((len(FEATURE_COLUMNS), len(df)), dtype=np.float32)
+    _compute_features(income, cs, exchange_rate, R, features)
+    for name, values in zip(FEATURE_COLUMNS[:5], features[:5]):
+        df[name] = values
     
     # Historical tracking
-    df['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    df['credit_score_category'] = pd.cut(df['credit_score'], bins=[300, 600, 750, 850], labels=['Low', 'Medium', 'High'])
+    # The load time is the same for every row, so keep it once; load_data records it in loan_runs
+    df.attrs['etl_timestamp'] = datetime.now().isoformat()
+    # Bucket (300, 600] / (600, 750] / (750, 850] with one binary search; out-of-range scores stay missing
+    codes = np.searchsorted(CREDIT_SCORE_BINS, cs).astype(np.int8)
+    codes[~((cs > 300) & (cs <= 850))] = -1
+    df['credit_score_category'] = pd.Categorical.from_codes(codes, categories=CREDIT_SCORE_LABELS)
     
-    # Advanced Risk Metrics
-    df['default_probability'] = 1 / (1 + np.exp(-(df['credit_score'] - 700) / 50))
-    df['expected_loss'] = df['default_probability'] * np.random.uniform(5000, 50000, size=len(df))
-    df['sharpe_ratio'] = (df['income'] - np.random.uniform(1000, 5000, size=len(df))) / np.random.uniform(500, 2000, size=len(df))
-    df['value_at_risk'] = -1.65 * np.random.uniform(1000, 10000, size=len(df))
+    for name, values in zip(FEATURE_COLUMNS[5:], features[5:]):
+        df[name] = values
     
     return df
 
-def load_data_to_sqlite(df, db_path=DB_PATH):
-    """Load cleaned data into SQLite database with indexing."""
+def sqlite_type(dtype):
+    """Map a pandas dtype to the SQLite column type used for the loans table."""
+    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+def load_data(chunks, db_path=DB_PATH, parquet_path=PARQUET_PATH):
+    """Load cleaned data (a DataFrame or an iterable of DataFrame chunks) into SQLite with indexing, plus a Parquet copy.
+    
+    Each run is recorded once in ``loan_runs`` (timestamp and the exchange rate used for ``income_usd``);
+    loan rows reference it through an int32 ``run_id`` column.
+    Rows are bulk-loaded into a ``loans_staging`` table that only replaces ``loans`` once every chunk has
+    been written, so a failed run leaves the previous table, its indexes and ``loan_runs`` untouched.
+    The Parquet copy is likewise written to a temporary file and moved into place on success.
+    """
     logging.info("Loading data into SQLite...")
-    conn = sqlite3.connect(db_path)
-    df.to_sql('loans', conn, if_exists='replace', index=False)
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_credit_score ON loans (credit_score)")
-    conn.commit()
-    conn.close()
+    if isinstance(chunks, pd.DataFrame):
+        chunks = [chunks]
+    # Autocommit mode: transactions are opened explicitly below so DDL is covered too
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    
+    parquet_writer = None
+    parquet_tmp_path = f"{parquet_path}.tmp" if parquet_path else None
+    if pq is None:
+        logging.warning("pyarrow is not installed; skipping Parquet output.")
+        parquet_tmp_path = None
+    
+    try:
+        # One-shot bulk load: trade durability for speed (no journal, no fsync per insert).
+        # Without a journal ROLLBACK must not be used, hence the staging table.
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-200000")
+        conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+        
+        conn.execute("CREATE TABLE IF NOT EXISTS loan_runs (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, exchange_rate REAL)")
+        if 'exchange_rate' not in {row[1] for row in conn.execute("PRAGMA table_info(loan_runs)")}:
+            conn.execute("ALTER TABLE loan_runs ADD COLUMN exchange_rate REAL")
+        run_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM loan_runs").fetchone()[0]
+        timestamp = exchange_rate = None
+        
+        swapping = False
+        conn.execute("BEGIN")
+        conn.execute("DROP TABLE IF EXISTS loans_staging")
+        create_table = True
+        for df in chunks:
+            if timestamp is None:
+                timestamp = df.attrs.get('etl_timestamp', datetime.now().isoformat())
+                exchange_rate = df.attrs.get('exchange_rate')
+            df['run_id'] = np.int32(run_id)
+            
+            if not create_table:
+                # Later chunks (e.g. loan API data) are aligned to the schema set by the first chunk
+                extra = [col for col in df.columns if col not in table_columns]
+                if extra:
+                    logging.warning(f"Dropping columns not in the loans schema: {extra}")
+                df = df.reindex(columns=table_columns)
+            
+            columns = ', '.join(f'"{col}"' for col in df.columns)
+            if create_table:
+                table_columns = list(df.columns)
+                # The first chunk defines the schema; no indexes yet, they are built once after the insert
+                # (validate_data's seen_ids already keeps loan identifiers unique across chunks)
+                column_defs = ', '.join(f'"{col}" {sqlite_type(dtype)}' for col, dtype in df.dtypes.items())
+                conn.execute(f"CREATE TABLE loans_staging ({column_defs})")
+                create_table = False
+            
+            # Parameterized bulk INSERT; tolist() yields Python scalars and NaN is stored as NULL
+            rows = zip(*[df[col].to_numpy().tolist() for col in df.columns])
+            conn.executemany(f"INSERT INTO loans_staging ({columns}) VALUES ({', '.join('?' * len(df.columns))})", rows)
+            
+            if parquet_tmp_path:
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(parquet_tmp_path, table.schema, compression='zstd', use_dictionary=True)
+                if table.schema.equals(parquet_writer.schema, check_metadata=False):
+                    parquet_writer.write_table(table)
+                else:
+                    # Casting to the first chunk's types could truncate or fail; keep SQLite and skip Parquet
+                    changed = [field.name for field in table.schema if parquet_writer.schema.field(field.name).type != field.type]
+                    logging.warning(f"Column types changed between chunks ({changed}); skipping the Parquet copy.")
+                    parquet_writer.close()
+                    parquet_writer = None
+                    os.remove(parquet_tmp_path)
+                    parquet_tmp_path = None
+        conn.execute("COMMIT")
+        
+        if create_table:
+            logging.warning("No data to load; the existing loans table was left unchanged.")
+            return
+        
+        # Swap the staged rows in and record the run; an in-memory journal makes this step undoable
+        conn.execute("PRAGMA journal_mode=MEMORY")
+        swapping = True
+        conn.execute("BEGIN")
+        conn.execute("DROP TABLE IF EXISTS loans")
+        conn.execute("ALTER TABLE loans_staging RENAME TO loans")
+        conn.execute("CREATE INDEX idx_credit_score ON loans (credit_score)")
+        conn.execute("CREATE INDEX idx_loan_status ON loans (loan_status)")
+        conn.execute("INSERT INTO loan_runs (id, timestamp, exchange_rate) VALUES (?, ?, ?)", (run_id, timestamp, exchange_rate))
+        conn.execute("COMMIT")
+        conn.execute("ANALYZE loans")
+    except Exception:
+        if conn.in_transaction:
+            # While journaling is OFF only the staging table has been touched, so just end the transaction
+            conn.execute("ROLLBACK" if swapping else "COMMIT")
+        conn.execute("DROP TABLE IF EXISTS loans_staging")
+        if parquet_writer is not None:
+            parquet_writer.close()
+            parquet_writer = None
+            os.remove(parquet_tmp_path)
+        raise
+    finally:
+        conn.close()
+        if parquet_writer is not None:
+            parquet_writer.close()
+    
+    if parquet_writer is not None:
+        os.replace(parquet_tmp_path, parquet_path)
+        logging.info(f"Parquet copy written to {parquet_path}.")
+    elif parquet_path and os.path.exists(parquet_path):
+        # A Parquet file from an earlier run would no longer match the loans table
+        os.remove(parquet_path)
+        logging.info(f"Removed stale Parquet copy {parquet_path}.")
 
 def main():
     """Main ETL pipeline execution."""
-    df = extract_data(DATA_PATH, LOAN_API_URL, API_URL)
-    df = validate_data(df)
-    df = transform_data(df)
-    load_data_to_sqlite(df)
+    label_encoders = {}
+    seen_ids = set()
+    
+    def process(chunks):
+        for chunk in chunks:
+            # Classify columns once per chunk and share the result with both stages
+            numeric_cols, categorical_cols = split_columns(chunk)
+            chunk = validate_data(chunk, numeric_cols, categorical_cols, seen_ids=seen_ids)
+            yield transform_data(chunk, label_encoders, categorical_cols)
+    
+    load_data(process(extract_data(DATA_PATH, LOAN_API_URL, API_URL)))
     logging.info("ETL process completed successfully!")
 
 if __name__ == "__main__":
@@ -1,25 +1,47 @@
+import os
+import numpy as np
 import pandas as pd
 import sqlite3
 import matplotlib.pyplot as plt
 import seaborn as sns
 
-# Connect to SQLite database
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; without it the SQLite table is read instead
+    pq = None
+
 db_path = "loans.db"
-conn = sqlite3.connect(db_path)
+parquet_path = "loans.parquet"
+expected_columns = ['loan_status', 'credit_score', 'income_usd', 'debt_service_ratio', 'default_probability']
 
-# Load data
-df = pd.read_sql_query("SELECT * FROM loans", conn)
-conn.close()
+# Load data: prefer the columnar Parquet copy written by the ETL, reading only the plotted columns
+if pq is not None and os.path.exists(parquet_path):
+    # Only request columns present in the file, so missing ones reach the warning below
+    available = set(pq.read_schema(parquet_path).names)
+    df = pd.read_parquet(parquet_path, columns=[col for col in expected_columns if col in available])
+else:
+    # Connect to SQLite database
+    conn = sqlite3.connect(db_path)
+    # Select only the columns the plots use (those present in the table) rather than SELECT *
+    available = {row[1] for row in conn.execute("PRAGMA table_info(loans)")}
+    selected = [col for col in expected_columns + ['credit_score_category'] if col in available]
+    if selected:
+        df = pd.read_sql_query(f"SELECT {', '.join(selected)} FROM loans", conn)
+    else:
+        df = pd.DataFrame()  # No table or none of the expected columns; reported as missing below
+    conn.close()
 
 # Check for missing columns
-expected_columns = ['loan_status', 'credit_score', 'income_usd', 'debt_service_ratio', 'default_probability']
 missing_columns = [col for col in expected_columns if col not in df.columns]
 if missing_columns:
     print(f"⚠️ Warning: Missing columns in the dataset: {missing_columns}")
 else:
     # Ensure correct column names after encoding
     if 'loan_status' in df.columns:
-        df['loan_status'] = df['loan_status'].map({1: "Approved", 0: "Denied"})
+        # Codes 0/1 index straight into the labels; anything else becomes missing, as with a dict map
+        status = df['loan_status'].to_numpy()
+        codes = np.where(np.isin(status, (0, 1)), status, -1).astype(np.int8)
+        df['loan_status'] = pd.Categorical.from_codes(codes, categories=["Denied", "Approved"])
     
     if 'credit_score_category' in df.columns:
         df['credit_score_category'] = df['credit_score_category'].astype(str)
@@ -27,6 +49,10 @@ else:
     # Set style
     sns.set(style="whitegrid")
     
+    # Downsample for the per-point scatter and the KDE; the shape of both is preserved at these sizes
+    scatter_df = df.sample(n=min(len(df), 20_000), random_state=0)
+    kde_df = df.sample(n=min(len(df), 50_000), random_state=0)
+    
     # Loan Approval vs. Denial Count
     plt.figure(figsize=(6,4))
     sns.countplot(x='loan_status', data=df, palette='coolwarm')
@@ -37,10 +63,10 @@ else:
     
     # Credit Score Distribution
     plt.figure(figsize=(6,4))
-    sns.histplot(df['credit_score'], bins=30, kde=True, color='blue')
+    sns.histplot(df['credit_score'], bins=np.linspace(300, 850, 31), stat='density', kde=True, color='blue')
     plt.title("Credit Score Distribution")
     plt.xlabel("Credit Score")
-    plt.ylabel("Frequency")
+    plt.ylabel("Density")
     plt.show()
     
     # Debt-to-Income Ratio vs. Loan Status
@@ -53,7 +79,7 @@ else:
     
     # Credit Risk Score vs. Income (Correlation)
     plt.figure(figsize=(6,4))
-    sns.scatterplot(x='income_usd', y='credit_score', hue='loan_status', data=df, palette='coolwarm', alpha=0.7)
+    sns.scatterplot(x='income_usd', y='credit_score', hue='loan_status', data=scatter_df, palette='coolwarm', alpha=0.7)
     plt.title("Credit Score vs. Income")
     plt.xlabel("Income (USD)")
     plt.ylabel("Credit Score")
@@ -61,7 +87,7 @@ else:
     
     # Loan Default Probability Distribution
     plt.figure(figsize=(6,4))
-    sns.kdeplot(df['default_probability'], shade=True, color='red')
+    sns.kdeplot(kde_df['default_probability'], bw_method='scott', shade=True, color='red')
     plt.title("Loan Default Probability Distribution")
     plt.xlabel("Default Risk Probability")
     plt.ylabel("Density")
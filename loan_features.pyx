@@ -0,0 +1,34 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""Cython specialization of the transform_data feature kernel for the fixed loan schema.
+
+Built on import through pyximport (see loan_features.pyxbld); etl_pipeline falls back to the
+numba/NumPy kernels when Cython or a C compiler is unavailable.
+"""
+from cython.parallel cimport prange
+from libc.math cimport expf
+
+
+cdef void _compute(const float[::1] income, const float[::1] cs, float exchange_rate,
+                   const float[:, ::1] R, float[:, ::1] out) noexcept nogil:
+    cdef Py_ssize_t i, n = income.shape[0]
+    cdef float inc, default_probability
+    cdef float inv_exchange_rate = 1.0 / exchange_rate
+    for i in prange(n, schedule='static'):
+        inc = income[i]
+        default_probability = 1.0 / (1.0 + expf(-(cs[i] - 700.0) * (1.0 / 50.0)))
+        out[0, i] = inc * inv_exchange_rate
+        out[1, i] = 0.2 + 0.6 * R[0, i]
+        out[2, i] = inc / (10000.0 + 40000.0 * R[1, i])
+        out[3, i] = 0.5 + R[2, i]
+        out[4, i] = inc - (5000.0 + 20000.0 * R[3, i])
+        out[5, i] = default_probability
+        out[6, i] = default_probability * (5000.0 + 45000.0 * R[4, i])
+        out[7, i] = (inc - (1000.0 + 4000.0 * R[5, i])) / (500.0 + 1500.0 * R[6, i])
+        out[8, i] = -1.65 * (1000.0 + 9000.0 * R[7, i])
+
+
+def compute_features(const float[::1] income, const float[::1] cs, float exchange_rate,
+                     const float[:, ::1] R, float[:, ::1] out):
+    """Fill the float32 (9, N) ``out`` block with the risk features; same contract as the Python kernels."""
+    with nogil:
+        _compute(income, cs, exchange_rate, R, out)